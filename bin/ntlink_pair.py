@@ -105,24 +105,22 @@ class NtLink():
     def print_directed_graph(graph, out_prefix):
         "Prints the directed scaffold graph in dot format"
         out_graph = out_prefix + ".scaffold.dot"
-        outfile = open(out_graph, 'w')
         print(datetime.datetime.today(), ": Printing graph", out_graph, sep=" ", file=sys.stdout)
 
-        outfile.write("digraph G {\n")
+        names = ntlink_utils.vertex_names(graph)
+        gap_estimates, edge_e, num_links = graph.es()["d"], graph.es()["e"], graph.es()["n"]
 
-        for node in graph.vs():
-            node_label = "\"{scaffold}\" [l={length}]\n".\
-                format(scaffold=node['name'], length=NtLink.scaffolds[node['name'][:-1]].length)
-            outfile.write(node_label)
+        lines = ["digraph G {\n"]
+        lines.extend("\"{scaffold}\" [l={length}]\n".format(scaffold=name, length=NtLink.scaffolds[name[:-1]].length)
+                     for name in names)
+        lines.extend("\"{source}\" -> \"{target}\" [d={d} e={e} n={n}]\n".
+                     format(source=names[source], target=names[target],
+                            d=int(gap_estimates[i]), e=edge_e[i], n=num_links[i])
+                     for i, (source, target) in enumerate(graph.get_edgelist()))
+        lines.append("}\n")
 
-        for edge in graph.es():
-            edge_str = "\"{source}\" -> \"{target}\" [d={d} e={e} n={n}]\n".\
-                format(source=ntlink_utils.vertex_name(graph, edge.source),
-                       target=ntlink_utils.vertex_name(graph, edge.target),
-                       d=int(edge['d']), e=edge['e'], n=edge['n'])
-            outfile.write(edge_str)
-
-        outfile.write("}\n")
+        with open(out_graph, 'w', buffering=1 << 20) as outfile:
+            outfile.writelines(lines)
 
     def calculate_gap_size(self, i_mx, i_ori, j_mx, j_ori, est_distance):
         "Calculates the estimated distance between two contigs"
@@ -258,17 +256,15 @@ class NtLink():
             edges[pair.format_source()][pair.format_target()] = pairs[pair]
             edges[reversed_pair.format_source()][reversed_pair.format_target()] = pairs[pair]
 
+        # Edges are assigned consecutive ids in the order they are added, so the attributes can be set in that order
         formatted_edges = [(s, t) for s in edges for t in edges[s]]
+        edge_info = [pair_info for targets in edges.values() for pair_info in targets.values()]
         graph.add_vertices(list(vertices))
         graph.add_edges(formatted_edges)
 
-        edge_attributes = {ntlink_utils.edge_index(graph, s, t): {'d': edges[s][t].get_gap_estimate(),
-                                                                  "e": 100,
-                                                                  "n": edges[s][t].n_supporting_reads()}
-                           for s in edges for t in edges[s]}
-        graph.es()["d"] = [edge_attributes[e]['d'] for e in sorted(edge_attributes.keys())]
-        graph.es()["e"] = [edge_attributes[e]['e'] for e in sorted(edge_attributes.keys())]
-        graph.es()["n"] = [edge_attributes[e]['n'] for e in sorted(edge_attributes.keys())]
+        graph.es()["d"] = [pair_info.get_gap_estimate() for pair_info in edge_info]
+        graph.es()["e"] = [100]*len(edge_info)
+        graph.es()["n"] = [pair_info.n_supporting_reads() for pair_info in edge_info]
 
         return graph
 
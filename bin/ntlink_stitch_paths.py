@@ -5,19 +5,70 @@ Stitch together paths with information from n-sweep from abyss-scaffold
 __author__ = "laurencoombe"
 
 import argparse
+import array
 import datetime
 import re
 import sys
 import os
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+from itertools import product
 import igraph as ig
 import numpy as np
 import ntlink_utils
 from path_node import PathNode
 
+_NODE_RE = re.compile(r'\"(\S+[+-])\"\s+\[l\=\d+\]')
+_EDGE_RE = re.compile(r'\"(\S+[+-])\"\s+\-\>\s+\"(\S+[+-])\"\s+\[d\=(\-?\d+)\s+e\=\d+\s+n\=(\d+)\]')
+_GAP_RE = re.compile(r'(\d+)N')
+_GAP_FULL_RE = re.compile(r'^(\d+)N$')
+
+_READ_BUFFER_SIZE = 1 << 20  # Large read buffer for dot/path files, which can be hundreds of MB
+
+# Lookup tables for a path graph: vertex name -> successor names, in-degree and out-degree
+PathGraphInfo = namedtuple("PathGraphInfo", ["adjacency", "in_degrees", "out_degrees"])
+
+_reverse_scaf_ori = lru_cache(maxsize=1 << 20)(ntlink_utils.reverse_scaf_ori)
+
 class NtLinkPath:
     "Instance of ntLink stitch path phase"
 
+    @staticmethod
+    def is_oriented_name(name):
+        "Returns True if the vertex name has no whitespace and ends in an orientation (+/-)"
+        return len(name) > 1 and name[-1] in ("+", "-") and name.split() == [name]
+
+    @staticmethod
+    def parse_dot_node(line):
+        "Parse a dot node line, returning the node name, or None if the line is not a node"
+        fields = line.split('"')
+        if len(fields) == 3 and fields[0] == "" and fields[2].startswith(" [l=") and fields[2].endswith("]") and \
+                fields[2][4:-1].isdecimal() and NtLinkPath.is_oriented_name(fields[1]):
+            return fields[1]
+        node_match = _NODE_RE.match(line)
+        if node_match:
+            return node_match.group(1)
+        return None
+
+    @staticmethod
+    def parse_dot_edge(line):
+        "Parse a dot edge line, returning (source, target, gap_est, num_links), or None if the line is not an edge"
+        fields = line.split('"')
+        if len(fields) == 5 and fields[0] == "" and fields[2] == " -> " and \
+                fields[4].startswith(" [") and fields[4].endswith("]"):
+            attributes = fields[4][2:-1].split(" ")
+            if len(attributes) == 3 and attributes[0].startswith("d=") and attributes[1].startswith("e=") and \
+                    attributes[2].startswith("n="):
+                gap_est, num_links = attributes[0][2:], attributes[2][2:]
+                gap_digits = gap_est[1:] if gap_est.startswith("-") else gap_est
+                if gap_digits.isdecimal() and attributes[1][2:].isdecimal() and num_links.isdecimal() and \
+                        NtLinkPath.is_oriented_name(fields[1]) and NtLinkPath.is_oriented_name(fields[3]):
+                    return fields[1], fields[3], int(gap_est), int(num_links)
+        edge_match = _EDGE_RE.match(line)
+        if edge_match:
+            return edge_match.group(1), edge_match.group(2), int(edge_match.group(3)), int(edge_match.group(4))
+        return None
+
     @staticmethod
     def read_scaffold_graph(in_graph_file):
         "Reads in a scaffold graph in dot format"
@@ -25,42 +76,41 @@ class NtLinkPath:
         graph = ig.Graph(directed=True)
 
         vertices = set()
-        edges = defaultdict(dict)  # source -> target -> EdgeInfo
-
-        node_re = re.compile(r'\"(\S+[+-])\"\s+\[l\=\d+\]')
-        edge_re = re.compile(r'\"(\S+[+-])\"\s+\-\>\s+\"(\S+[+-])\"\s+\[d\=(\-?\d+)\s+e\=\d+\s+n\=(\d+)\]')
+        sources, targets = [], []
+        gap_estimates, num_links = array.array('i'), array.array('i')
 
         past_header = False
+        parse_dot_edge, parse_dot_node = NtLinkPath.parse_dot_edge, NtLinkPath.parse_dot_node
 
-        with open(in_graph_file, 'r') as in_graph:
+        with open(in_graph_file, 'r', buffering=_READ_BUFFER_SIZE) as in_graph:
             for line in in_graph:
                 line = line.strip()
                 if not past_header:
                     past_header = True
                     continue
-                node_match = re.search(node_re, line)
-                if node_match:
-                    vertices.add(node_match.group(1))
-                    continue
+                if "->" in line:
+                    edge = parse_dot_edge(line)
+                    if edge is not None:
+                        sources.append(edge[0])
+                        targets.append(edge[1])
+                        gap_estimates.append(edge[2])
+                        num_links.append(edge[3])
+                        continue
+                else:
+                    node = parse_dot_node(line)
+                    if node is not None:
+                        vertices.add(node)
+                        continue
 
-                edge_match = re.search(edge_re, line)
-                if edge_match:
-                    source, target, gap_est, num_links = edge_match.group(1), edge_match.group(2), \
-                                                         edge_match.group(3), edge_match.group(4)
-                    edges[source][target] = (int(gap_est), int(num_links))
-                elif line != "}":
+                if line != "}":
                     print("Error! Unexpected line in input dot file:", line)
                     sys.exit(1)
 
-        formatted_edges = [(s, t) for s in edges for t in edges[s]]
         graph.add_vertices(list(vertices))
-        graph.add_edges(formatted_edges)
+        graph.add_edges(list(zip(sources, targets)))
 
-        edge_attributes = {ntlink_utils.edge_index(graph, s, t): {'d': edges[s][t][0],
-                                                                  "n": edges[s][t][1]}
-                           for s in edges for t in edges[s]}
-        graph.es()["d"] = [edge_attributes[e]['d'] for e in sorted(edge_attributes.keys())]
-        graph.es()["n"] = [edge_attributes[e]['n'] for e in sorted(edge_attributes.keys())]
+        graph.es()["d"] = gap_estimates.tolist()
+        graph.es()["n"] = num_links.tolist()
 
         return graph
 
@@ -72,145 +122,138 @@ class NtLinkPath:
 
         graph = ig.Graph(directed=True)
 
-        gap_re = re.compile(r'(\d+)N')
-
         vertices = set()
         edges = defaultdict(dict)
 
-        with open(path_filename, 'r') as path_file:
+        with open(path_filename, 'r', buffering=_READ_BUFFER_SIZE) as path_file:
             for path in path_file:
                 path_id, path_sequence = path.strip().split("\t")
                 path_sequence = path_sequence.split(" ")
-                for i, j, k in zip(path_sequence, path_sequence[1:], path_sequence[2:]):
-                    gap_match = re.search(gap_re, j)
+                for idx in range(1, len(path_sequence) - 1):
+                    j = path_sequence[idx]
+                    if "N" not in j:
+                        continue # Cheap check before the regex - gap tokens always contain 'N'
+                    gap_match = _GAP_RE.match(j)
                     if not gap_match:
                         continue # Only continue if it is 2 scaffolds with gap between
+                    i, k = path_sequence[idx - 1], path_sequence[idx + 1]
+
+                    rev_i, rev_k = _reverse_scaf_ori(i), _reverse_scaf_ori(k)
 
                     # Add vertices
                     vertices.add(i)
                     vertices.add(k)
-                    vertices.add(ntlink_utils.reverse_scaf_ori(i))
-                    vertices.add(ntlink_utils.reverse_scaf_ori(k))
+                    vertices.add(rev_i)
+                    vertices.add(rev_k)
 
                     # Add edges
-                    assert i not in edges and k not in edges[i]
+                    assert k not in edges.get(i, {})
                     edges[i][k] = (gap_match.group(1), path_id)
-                    edges[ntlink_utils.reverse_scaf_ori(k)][ntlink_utils.reverse_scaf_ori(i)] = \
-                        (gap_match.group(1), path_id)
+                    edges[rev_k][rev_i] = (gap_match.group(1), path_id)
 
         graph.add_vertices(list(vertices))
 
         formatted_edges = [(s, t) for s in edges for t in edges[s]]
+        edge_info = [info for targets in edges.values() for info in targets.values()]
         graph.add_edges(formatted_edges)
 
-        edge_attributes = {ntlink_utils.edge_index(graph, s, t): {'d': edges[s][t][0],
-                                                                  "path_id": edges[s][t][1]}
-                           for s in edges for t in edges[s]}
-        graph.es()["d"] = [edge_attributes[e]['d'] for e in sorted(edge_attributes.keys())]
-        graph.es()["path_id"] = [edge_attributes[e]['path_id'] for e in sorted(edge_attributes.keys())]
+        graph.es()["d"] = [d for d, _ in edge_info]
+        graph.es()["path_id"] = [path_id for _, path_id in edge_info]
 
         return graph
 
     @staticmethod
-    def are_end_vertices(source, target, path_graph):
-        "Checks if both the source and target are end vertices"
-        return path_graph.vs()[ntlink_utils.vertex_index(path_graph, source)].outdegree() == 0 and \
-               path_graph.vs()[ntlink_utils.vertex_index(path_graph, target)].indegree() == 0
+    def are_end_vertices(source, target, in_degrees, out_degrees):
+        "Checks if both the source and target are end vertices, given vertex name -> degree dictionaries"
+        return out_degrees[source] == 0 and in_degrees[target] == 0
 
     @staticmethod
-    def is_end_vertex(graph, node, mode="out"):
-        "Returns true if the given node is an end vertex in mode specified"
-        assert mode in ["out", "in"]
-        if mode == "out":
-            return graph.vs()[ntlink_utils.vertex_index(graph, node)].outdegree() == 0
-        return graph.vs()[ntlink_utils.vertex_index(graph, node)].indegree() == 0
+    def is_end_vertex(node, degrees):
+        "Returns true if the given node is an end vertex, given vertex name -> in or out degree dictionary"
+        return degrees[node] == 0
 
     @staticmethod
-    def find_new_transitive_edges(edges, path, scaffold_graph, s, t):
+    def find_new_transitive_edges(edges, path, scaffold_adj, s, t):
         "Given a path, tally transitive edges"
         source_idx = path.index(s)
         source_vertices = path[:source_idx+1]
         target_vertices = path[source_idx+1:]
-        for source in source_vertices:
-            for target in target_vertices:
-                if source == s and target == t:
-                    continue
-                rev_s, rev_t = ntlink_utils.reverse_scaf_ori(source), ntlink_utils.reverse_scaf_ori(target)
-                if scaffold_graph.are_connected(source, target):
-                    continue
-                edges.add((source, target))
-                edges.add((rev_t, rev_s))
+        add_edge = edges.add
+        for source, target in product(source_vertices, target_vertices):
+            if source == s and target == t:
+                continue
+            if target in scaffold_adj[source]:
+                continue
+            add_edge((source, target))
+            add_edge((_reverse_scaf_ori(target), _reverse_scaf_ori(source)))
 
     @staticmethod
     def is_contig(node, gap_re):
         "Returns true if the given node is a contig, so doesn't fit the regex of a gap node"
-        gap_match = re.search(gap_re, node)
+        gap_match = gap_re.match(node)
         return not gap_match
 
 
-    def add_transitive_support(self, scaffold_graph, path_sequence, path_graph, neighbourhood=4):
-        "Given a path sequence and a graph, add all transitive edges"
+    def add_transitive_support(self, scaffold_adj, path_sequence, path_adj, neighbourhood=4):
+        "Given a path sequence and the graph adjacencies, add all transitive edges"
         edges = set()
-        gap_re = re.compile(r"^\d+N$")
-        path_sequence = [node for node in path_sequence if self.is_contig(node, gap_re)]
+        path_sequence = [node for node in path_sequence if self.is_contig(node, _GAP_FULL_RE)]
         for idx, s_t in enumerate(zip(path_sequence, path_sequence[1:])):
             s, t = s_t
-            if not (ntlink_utils.has_vertex(path_graph, s) and ntlink_utils.has_vertex(path_graph, t) and
-                    path_graph.are_connected(s, t)):
+            if not (s in path_adj and t in path_adj[s]):
                 start, end = max(0, idx - neighbourhood), min(len(path_sequence), idx + neighbourhood + 2)
                 path_neighbourhood = path_sequence[start:end] # 1 target, 1 past
-                self.find_new_transitive_edges(edges, path_neighbourhood, scaffold_graph, s, t)
+                self.find_new_transitive_edges(edges, path_neighbourhood, scaffold_adj, s, t)
 
         return edges
 
-    def read_alternate_pathfile(self, filename, path_graph, new_vertices, new_edges, scaffold_graph):
+    def read_alternate_pathfile(self, filename, path_info, new_vertices, new_edges, scaffold_adj):
         "Read through alt abyss-scaffold output file, adding potential new edges"
         print("Reading {}".format(filename), file=sys.stderr)
-        gap_re = re.compile(r'^(\d+)N$')
         trans_edges = set()
+        path_adj, in_degrees, out_degrees = path_info
 
         if not os.path.exists(filename):
             print("{} does not exist, skipping.".format(filename), file=sys.stderr)
             return set()
-        with open(filename, 'r') as fin:
+        with open(filename, 'r', buffering=_READ_BUFFER_SIZE) as fin:
             for path in fin:
                 _, path_sequence = path.strip().split("\t")
                 path_sequence = path_sequence.split(" ")
-                trans_edges = set.union(trans_edges, self.add_transitive_support(scaffold_graph,
-                                                                                 path_sequence, path_graph))
-                for i, j, k in zip(path_sequence, path_sequence[1:], path_sequence[2:]):
-                    gap_match = re.search(gap_re, j)
+                trans_edges = set.union(trans_edges, self.add_transitive_support(scaffold_adj,
+                                                                                 path_sequence, path_adj))
+                for idx in range(1, len(path_sequence) - 1):
+                    j = path_sequence[idx]
+                    if "N" not in j:
+                        continue
+                    gap_match = _GAP_FULL_RE.match(j)
                     if not gap_match:
                         continue
-                    source, target, gap_est = i, k, int(gap_match.group(1))
-                    if ntlink_utils.has_vertex(path_graph, source) and \
-                            ntlink_utils.has_vertex(path_graph, target):
-                        if path_graph.are_connected(source, target):
+                    source, target, gap_est = path_sequence[idx - 1], path_sequence[idx + 1], int(gap_match.group(1))
+                    if source in path_adj and target in path_adj:
+                        if target in path_adj[source]:
                             continue # continue if the source/target are already connected
-                        if self.are_end_vertices(source, target, path_graph):
+                        if self.are_end_vertices(source, target, in_degrees, out_degrees):
                             self.add_path_edges(gap_est, source, target, new_edges)
 
-                    if ntlink_utils.has_vertex(path_graph, source) and \
-                            not ntlink_utils.has_vertex(path_graph, target) and \
-                            self.is_end_vertex(path_graph, source, mode="out"):
+                    if source in path_adj and target not in path_adj and \
+                            self.is_end_vertex(source, out_degrees):
                         new_vertices.add(target)
-                        new_vertices.add(ntlink_utils.reverse_scaf_ori(target))
+                        new_vertices.add(_reverse_scaf_ori(target))
                         self.add_path_edges(gap_est, source, target, new_edges)
 
-                    if ntlink_utils.has_vertex(path_graph, target) and \
-                            not ntlink_utils.has_vertex(path_graph, source) and \
-                            self.is_end_vertex(path_graph, target, mode="in"):
+                    if target in path_adj and source not in path_adj and \
+                            self.is_end_vertex(target, in_degrees):
                         new_vertices.add(source)
-                        new_vertices.add(ntlink_utils.reverse_scaf_ori(source))
+                        new_vertices.add(_reverse_scaf_ori(source))
                         self.add_path_edges(gap_est, source, target, new_edges)
 
-                    if not ntlink_utils.has_vertex(path_graph, source) and \
-                            not ntlink_utils.has_vertex(path_graph, target):
+                    if source not in path_adj and target not in path_adj:
                         new_vertices.add(source)
-                        new_vertices.add(ntlink_utils.reverse_scaf_ori(source))
+                        new_vertices.add(_reverse_scaf_ori(source))
 
                         new_vertices.add(target)
-                        new_vertices.add(ntlink_utils.reverse_scaf_ori(target))
+                        new_vertices.add(_reverse_scaf_ori(target))
 
                         self.add_path_edges(gap_est, source, target, new_edges)
         return trans_edges
@@ -218,21 +261,16 @@ class NtLinkPath:
     @staticmethod
     def add_path_edges(gap_dist, source, target, new_edges):
         "Add the new path edges in both orientations to given graph"
-        if (source not in new_edges) or \
-                (source in new_edges and target not in new_edges[source]):
-            new_edges[source][target] = [gap_dist]
-        else:
-            new_edges[source][target].append(gap_dist)
-
-        rev_target, rev_source = ntlink_utils.reverse_scaf_ori(source), ntlink_utils.reverse_scaf_ori(target)
-        if (rev_source not in new_edges) or \
-                (rev_source in new_edges and rev_target not in new_edges[rev_source]):
-            new_edges[rev_source][rev_target] = [gap_dist]
-        else:
-            new_edges[rev_source][rev_target].append(gap_dist)
-
-    def read_alternate_pathfiles(self, path_graph, scaffold_graph, best_filename):
+        new_edges[source].setdefault(target, []).append(gap_dist)
+        rev_target, rev_source = _reverse_scaf_ori(source), _reverse_scaf_ori(target)
+        new_edges[rev_source].setdefault(rev_target, []).append(gap_dist)
+
+    def read_alternate_pathfiles(self, path_graph, scaffold_graph, scaffold_adj, best_filename):
         "Read through alt abyss-scaffold output files, adding potential new edges for paths"
+        path_names = ntlink_utils.vertex_names(path_graph)
+        path_info = PathGraphInfo(adjacency=ntlink_utils.get_adjacency(path_graph),
+                                  in_degrees=dict(zip(path_names, path_graph.indegree())),
+                                  out_degrees=dict(zip(path_names, path_graph.outdegree())))
         new_edges = defaultdict(dict)
         new_vertices = set()
         new_scaffold_edges = set()
@@ -240,8 +278,8 @@ class NtLinkPath:
         for path_file in self.args.PATH:
             if path_file == best_filename:
                 continue
-            new_trans_edges = self.read_alternate_pathfile(path_file, path_graph, new_vertices,
-                                                           new_edges, scaffold_graph)
+            new_trans_edges = self.read_alternate_pathfile(path_file, path_info, new_vertices,
+                                                           new_edges, scaffold_adj)
             new_scaffold_edges = set.union(new_scaffold_edges, new_trans_edges)
 
         path_graph.add_vertices(list(new_vertices))
@@ -250,96 +288,90 @@ class NtLinkPath:
         formatted_attributes = []
         before_edge = path_graph.ecount()
 
-        for new_source in new_edges:
-            for new_target in new_edges[new_source]:
+        for new_source, new_targets in new_edges.items():
+            for new_target, d in new_targets.items():
                 formatted_edges.append((new_source, new_target))
-                d = new_edges[new_source][new_target]
                 formatted_attributes.append(d)
         path_graph.add_edges(formatted_edges)
-        for i in range(before_edge, path_graph.ecount()):
-            d = formatted_attributes[i - before_edge]
-            path_graph.es()[i]["d"] = int(np.median(d))
-            path_graph.es()[i]["n"] = len(d)
-            path_graph.es()[i]["path_id"] = "new"
+        new_edge_seq = path_graph.es()[before_edge:]
+        new_edge_seq["d"] = [int(np.median(d)) for d in formatted_attributes]
+        new_edge_seq["n"] = [len(d) for d in formatted_attributes]
+        new_edge_seq["path_id"] = ["new"]*len(formatted_attributes)
 
         scaffold_graph.add_edges(list(new_scaffold_edges))
+        for source, target in new_scaffold_edges:
+            scaffold_adj[source].add(target)
 
     @staticmethod
     def linearize_graph(graph):
-        "Filter the graph to linearize it"
-        in_branch_nodes = [node.index for node in graph.vs() if node.indegree() > 1]
+        "Filter the graph to linearize it. The graph is modified in place"
+        path_ids, num_links = graph.es()["path_id"], graph.es()["n"]
+        in_branch_nodes = np.flatnonzero(np.asarray(graph.indegree()) > 1)
         to_remove_edges = set()
         for node in in_branch_nodes:
             max_weight_edge, max_weight = None, None
             incident_edges = graph.incident(node, mode=ig.IN) # pylint: disable=no-member
-            if all((graph.es()[edge]['path_id'] == "new" for edge in incident_edges)):
-                max_weight = max([graph.es()[edge]['n'] for edge in incident_edges])
-                max_weight_edges = [edge for edge in incident_edges if graph.es()[edge]['n'] == max_weight]
+            if all((path_ids[edge] == "new" for edge in incident_edges)):
+                max_weight = max(num_links[edge] for edge in incident_edges)
+                max_weight_edges = [edge for edge in incident_edges if num_links[edge] == max_weight]
                 if len(max_weight_edges) == 1:
                     max_weight_edge = max_weight_edges[0]
             for edge in incident_edges:
-                if edge != max_weight_edge and graph.es()[edge]['path_id'] == "new":
+                if edge != max_weight_edge and path_ids[edge] == "new":
                     to_remove_edges.add(edge)
 
-        out_branch_nodes = [node.index for node in graph.vs() if node.outdegree() > 1]
+        out_branch_nodes = np.flatnonzero(np.asarray(graph.outdegree()) > 1)
         for node in out_branch_nodes:
             max_weight_edge, max_weight = None, None
             incident_edges = graph.incident(node, mode=ig.OUT) # pylint: disable=no-member
-            if all((graph.es()[edge]['path_id'] == "new" for edge in incident_edges)):
-                max_weight = max([graph.es()[edge]['n'] for edge in incident_edges])
-                max_weight_edges = [edge for edge in incident_edges if graph.es()[edge]['n'] == max_weight]
+            if all((path_ids[edge] == "new" for edge in incident_edges)):
+                max_weight = max(num_links[edge] for edge in incident_edges)
+                max_weight_edges = [edge for edge in incident_edges if num_links[edge] == max_weight]
                 if len(max_weight_edges) == 1:
                     max_weight_edge = max_weight_edges[0]
             for edge in incident_edges:
-                if edge != max_weight_edge and graph.es()[edge]['path_id'] == "new":
+                if edge != max_weight_edge and path_ids[edge] == "new":
                     to_remove_edges.add(edge)
 
-        return_graph = graph.copy()
-        return_graph.delete_edges(list(to_remove_edges))
+        graph.delete_edges(list(to_remove_edges))
 
-        return return_graph
+        return graph
 
     @staticmethod
     def is_graph_linear(graph):
         "Given a graph, return True if all the components are linear"
-        for component in graph.components(mode="weak"):
-            component_graph = graph.subgraph(component)
-            if not all(u.indegree() < 2 for u in component_graph.vs()):
-                return False
-            if not all(u.outdegree() < 2 for u in component_graph.vs()):
-                return False
-        return True
+        # Weak components are vertex-disjoint, so degrees in the full graph match those in each component
+        in_degrees, out_degrees = np.asarray(graph.indegree()), np.asarray(graph.outdegree())
+        return bool((in_degrees < 2).all() and (out_degrees < 2).all())
 
     @staticmethod
-    def format_path_contigs(path, component_graph):
-        "Given a path (sequence of oriented contigs), format to a path of PathNode"
+    def format_path_contigs(path, gap_estimates):
+        "Given a path (sequence of oriented contigs) and the gap estimates between them, format to a path of PathNode"
         return_path = []
-        for ctga, ctgb in zip(path, path[1:]):
+        for ctga, gap_estimate in zip(path, gap_estimates):
             ctga_name, ctga_ori = ctga[:-1], ctga[-1]
-            edge_index = ntlink_utils.edge_index(component_graph, ctga, ctgb)
-            gap_estimate = component_graph.es()[edge_index]['d']
             return_path.append(PathNode(contig=ctga_name, ori=ctga_ori,
                                         gap_size=gap_estimate))
         last_ctg_name, last_ctg_ori = path[-1][:-1], path[-1][-1]
         return_path.append(PathNode(contig=last_ctg_name, ori=last_ctg_ori))
         return return_path
 
-    def find_paths_process(self, component):
-        "Find paths given a component of the graph"
+    def find_paths_process(self, graph, component, component_num_edges, degrees):
+        "Find paths given a component, its edge count and the full graph's (in, out) degree lists"
         return_paths = []
-        component_graph = NtLinkPath.gin.subgraph(component)
-        source_nodes = [node.index for node in component_graph.vs() if node.indegree() == 0]
+        in_degrees, out_degrees = degrees
+        source_nodes = [node for node in component if in_degrees[node] == 0]
         if len(source_nodes) == 1:
-            target_nodes = [node.index for node in component_graph.vs() if node.outdegree() == 0]
+            target_nodes = [node for node in component if out_degrees[node] == 0]
             assert len(target_nodes) == 1
             source, target = source_nodes.pop(), target_nodes.pop()
-            path = component_graph.get_shortest_paths(source, target)[0]
+            path = graph.get_shortest_paths(source, target)[0]
             num_edges = len(path) - 1
-            if len(path) == len(component_graph.vs()) and \
-                    num_edges == len(component_graph.es()) and len(path) == len(set(path)):
+            if len(path) == len(component) and \
+                    num_edges == component_num_edges and len(path) == len(set(path)):
                 # All the nodes/edges from the graph are in the simple path, no repeated nodes
-                path = ntlink_utils.convert_path_index_to_name(component_graph, path)
-                ctg_path = self.format_path_contigs(path, component_graph)
+                edge_indices = graph.get_eids(pairs=list(zip(path, path[1:])))
+                ctg_path = self.format_path_contigs(graph.vs()[path]['name'], graph.es()[edge_indices]['d'])
                 return_paths.append(ctg_path)
 
         return return_paths
@@ -350,41 +382,68 @@ class NtLinkPath:
         visited = set()
         return_paths = []
         for path in paths:
-            if not any((node.contig in visited for node in path)):
+            contigs = {node.contig for node in path}
+            if contigs.isdisjoint(visited):
                 return_paths.append(path)
-            for node in path:
-                visited.add(node.contig)
+            visited |= contigs
         return return_paths
 
     def find_paths(self, graph):
         "Finds paths through input scaffold graph"
         print(datetime.datetime.today(), ": Finding paths", file=sys.stderr)
-        NtLinkPath.gin = graph
         components = graph.components(mode="weak")
         print("\nTotal number of components in graph:", len(components), "\n", sep=" ", file=sys.stderr)
 
-        paths = [self.find_paths_process(component) for component in components]
+        membership = components.membership
+        component_num_edges = [0]*len(components)
+        for source, _ in graph.get_edgelist():
+            component_num_edges[membership[source]] += 1
+        degrees = (graph.indegree(), graph.outdegree())
+
+        paths = [self.find_paths_process(graph, component, component_num_edges[i], degrees)
+                 for i, component in enumerate(components)]
 
         paths_return = [path for path_list in paths for path in path_list]
         paths_return = self.remove_duplicate_paths(paths_return)
         return paths_return
 
     @staticmethod
-    def has_transitive_support(edge, path_graph, scaffold_graph):
+    def get_path_orderings(graph):
+        "Given a linear graph, return dictionary of vertex name -> (ordered vertex names of its component, position)"
+        names = ntlink_utils.vertex_names(graph)
+        indegrees = graph.indegree()
+        successors = [None]*graph.vcount()
+        for source, target in graph.get_edgelist():
+            successors[source] = target
+
+        orderings = {}
+        for component in graph.components(mode="weak"):
+            start_nodes = [node for node in component if indegrees[node] == 0]
+            start = start_nodes[0] if start_nodes else component[0]
+            order = [names[start]]
+            node = successors[start]
+            while node is not None and node != start:
+                order.append(names[node])
+                node = successors[node]
+            for position, name in enumerate(order):
+                orderings[name] = (order, position if start_nodes else None) # No position in a cycle
+        return orderings
+
+    @staticmethod
+    def has_transitive_support(edge, path_names, scaffold_adj, path_orderings):
         "Returns True if edge has transitive support"
-        source, target = ntlink_utils.vertex_name(path_graph, edge.source), \
-                         ntlink_utils.vertex_name(path_graph, edge.target)
+        source, target = path_names[edge.source], path_names[edge.target]
         source_pass, target_pass = False, False
-        path_size = len(path_graph.vs())
-        source_in_neighbourhood = [ntlink_utils.vertex_name(path_graph, idx)
-                                   for idx in path_graph.neighborhood(source, order=path_size, mode="in")]
-        target_out_neighbourhood = [ntlink_utils.vertex_name(path_graph, idx)
-                                    for idx in path_graph.neighborhood(target, order=path_size, mode="out")]
+        source_order, source_position = path_orderings[source]
+        target_order, target_position = path_orderings[target]
+        # All vertices that can reach the source, and all vertices reachable from the target
+        source_in_neighbourhood = source_order if source_position is None else source_order[:source_position+1]
+        target_out_neighbourhood = target_order if target_position is None else target_order[target_position:]
         for test_source in source_in_neighbourhood:
             for test_target in target_out_neighbourhood:
                 if test_source == source and test_target == target:
                     continue
-                if scaffold_graph.are_connected(test_source, test_target):
+                if test_target in scaffold_adj[test_source]:
                     if test_source == source or test_target == target:
                         if test_source == source:
                             source_pass = True
@@ -396,18 +455,19 @@ class NtLinkPath:
                         return True
         return False
 
-    def transitive_filter(self, path_graph, scaffold_graph):
-        "Filter out edges without any transitive support"
+    def transitive_filter(self, path_graph, scaffold_adj):
+        "Filter out edges without any transitive support. The path graph is modified in place"
         edges_to_remove = set()
+        path_orderings = self.get_path_orderings(path_graph)
+        path_names = ntlink_utils.vertex_names(path_graph)
         for edge in path_graph.es():
             if edge["path_id"] != "new":
                 continue
-            if not self.has_transitive_support(edge, path_graph, scaffold_graph):
+            if not self.has_transitive_support(edge, path_names, scaffold_adj, path_orderings):
                 edges_to_remove.add(edge.index)
 
-        new_graph = path_graph.copy()
-        new_graph.delete_edges(list(edges_to_remove))
-        return new_graph
+        path_graph.delete_edges(list(edges_to_remove))
+        return path_graph
 
 
     @staticmethod
@@ -470,17 +530,16 @@ class NtLinkPath:
             sys.exit(0)
 
         scaffold_graph = self.read_scaffold_graph(self.args.g)
+        scaffold_adj = ntlink_utils.get_adjacency(scaffold_graph)
 
-        self.read_alternate_pathfiles(path_graph, scaffold_graph, best_file)
+        self.read_alternate_pathfiles(path_graph, scaffold_graph, scaffold_adj, best_file)
 
         path_graph = self.linearize_graph(path_graph)
         assert self.is_graph_linear(path_graph)
 
         if self.args.transitive:
             print("Checking for transitive support...\n", file=sys.stderr)
-            path_graph = self.transitive_filter(path_graph, scaffold_graph)
-
-        NtLinkPath.gin = path_graph
+            path_graph = self.transitive_filter(path_graph, scaffold_adj)
 
         paths = self.find_paths(path_graph)
 
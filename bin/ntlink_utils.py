@@ -12,25 +12,17 @@ from read_fasta import read_fasta
 
 Scaffold = namedtuple("Scaffold", ["id", "length"])
 
-def vertex_name(graph, index):
-    "Returns vertex name based on vertex id"
-    return graph.vs()[index]['name']
-
-def vertex_index(graph, name):
-    "Returns vertex index based on vertex name"
-    return graph.vs.find(name).index
-
-def edge_index(graph, source_name, target_name):
-    "Returns graph edge index based on source/target names"
-    return graph.get_eid(source_name, target_name)
-
-def has_vertex(graph, name):
-    "Returns True if graph has vertex, else False"
-    try:
-        graph.vs().find(name)
-    except ValueError:
-        return False
-    return True
+def vertex_names(graph):
+    "Returns list of all vertex names, indexed by vertex id"
+    return graph.vs()['name'] if graph.vcount() > 0 else []
+
+def get_adjacency(graph):
+    "Returns dictionary of vertex name -> set of successor vertex names"
+    names = vertex_names(graph)
+    adjacency = {name: set() for name in names}
+    for source, target in graph.get_edgelist():
+        adjacency[names[source]].add(names[target])
+    return adjacency
 
 def read_fasta_file(filename):
     "Read a fasta file into memory. Returns dictionary of scafID -> Scaffold"
@@ -42,10 +34,6 @@ def read_fasta_file(filename):
 
     return scaffolds
 
-def convert_path_index_to_name(graph, path):
-    "Convert path of vertex indices to path of vertex names"
-    return [vertex_name(graph, vs) for vs in path]
-
 def reverse_orientation(orientation):
     "Flip the given orientation"
     assert orientation in ("+", "-")
@@ -1,9 +1,14 @@
 """Tests for ntLink"""
 
+import os
 import shlex
 import subprocess
+import sys
 import re
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bin"))
+from ntlink_stitch_paths import NtLinkPath, _NODE_RE, _EDGE_RE # pylint: disable=wrong-import-position,import-error
+
 def cleanup_files(file_list):
     "Remove all files in the input list"
     subprocess.call("ls")
@@ -82,4 +87,25 @@ def test_3():
     files_to_delete = ["scaffolds_3.fa.k24.w250.z500.stitch.abyss-scaffold.fa",
                        "scaffolds_3.fa.k24.w250.tsv", "test3.pairs.tsv",
                        "test3.n2.scaffold.dot", "test3.stitch.path"]
-    cleanup_files(files_to_delete)
\ No newline at end of file
+    cleanup_files(files_to_delete)
+
+def test_parse_dot_lines():
+    "Testing that the dot line parsers accept and reject exactly the lines the dot regexes do"
+    node_lines = ['"188266+" [l=33803]', '"a+"\t[l=5]', '"a+" [l=5] extra', '"a b+" [l=5]', '"a+" [l=x]',
+                  '"a+" foo [l=5]', '"a" [l=5]', '"+" [l=5]', '"a+" [l=]', ' "a+" [l=5]']
+    for line in node_lines:
+        node_match = _NODE_RE.match(line)
+        assert NtLinkPath.parse_dot_node(line) == (node_match.group(1) if node_match else None)
+
+    edge_lines = ['"188266+" -> "189231-" [d=4613 e=100 n=14]', '"a+" -> "b-" [d=-12 e=100 n=3]',
+                  '"a+"  ->  "b-"  [d=5  e=1  n=3]', '"a" -> "c" [d=1 e=100 n=2]', '"a b+" -> "c+" [d=1 e=100 n=2]',
+                  '"a+" <-> "c+" [d=1 xx n=2]', '"a+" -> "c+" [d=1 xx=100 n=2]', '"a+"->"c+" [d=1 e=100 n=2]',
+                  '"a+" -> "c+" [d=- e=100 n=2]', '"a+" -> "c+" [d=1 e=100 n=x]', '"a+" -> "c+" [d=1 e= n=2]']
+    for line in edge_lines:
+        edge_match = _EDGE_RE.match(line)
+        expected = (edge_match.group(1), edge_match.group(2), int(edge_match.group(3)), int(edge_match.group(4))) \
+            if edge_match else None
+        assert NtLinkPath.parse_dot_edge(line) == expected
+
+    assert NtLinkPath.parse_dot_node('"a b+" [l=5]') is None
+    assert NtLinkPath.parse_dot_edge('"a" -> "c" [d=1 e=100 n=2]') is None